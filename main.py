@@ -1,8 +1,12 @@
 import argparse
+import sys
 from getpass import getpass
 from typing import List, Tuple
+from pymysql.constants import CLIENT
 from mysql_helper import MySqlHelper
 
+# email 上的 UNIQUE 索引在 InnoDB 里每条记录都带着主键 id，本身就等价于 (email, id)；
+# cmd_dedupe 的 GROUP BY email / MIN(id) 可以只扫这个索引，不需要再建复合索引
 TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS test_users (
     id INT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
@@ -26,8 +30,8 @@ def cmd_init(db: MySqlHelper):
 
 def cmd_seed(db: MySqlHelper):
     """批量插入示例数据（去重插入）"""
-    db.execute_many(
-        "INSERT IGNORE INTO test_users (name, email) VALUES (%s, %s)",
+    db.bulk_insert(
+        "INSERT IGNORE INTO test_users (name, email) VALUES",
         SAMPLE_USERS
     )
     print("✅ Seeded sample users (INSERT IGNORE).")
@@ -52,8 +56,10 @@ def cmd_list(db: MySqlHelper, order: str, limit: int):
     if not rows:
         print("No data.")
         return
-    for r in rows:
-        print(f"{r['id']:>3} | {r['name']:<20} | {r['email']:<25} | {r['created_at']}")
+    # 先拼好整段再一次写出，行数多时比逐行 print 少很多次系统调用
+    sys.stdout.write("\n".join(
+        f"{r['id']:>3} | {r['name']:<20} | {r['email']:<25} | {r['created_at']}" for r in rows
+    ) + "\n")
 
 def cmd_update_name(db: MySqlHelper, user_id: int, new_name: str):
     """通过主键安全更新姓名"""
@@ -88,35 +94,37 @@ def cmd_dedupe(db: MySqlHelper):
     """
     删除重复行：按 email 视为唯一，保留每个 email 的最小id 其余删掉
     """
-    # 先查出重复的 email 对应要删除的 id 集合
-    to_delete = db.execute_query("""
-        SELECT DISTINCT t1.id
-        FROM test_users t1
-        JOIN test_users t2
-          ON t1.email = t2.email AND t1.id > t2.id
-    """)
-    if not to_delete:
+    # 一次 GROUP BY 扫描算出每个 email 要保留的 MIN(id)，其余按主键删除；
+    # 外面再包一层派生表，绕开 MySQL 不允许在子查询里直接引用被删除表的限制
+    sql = """
+        DELETE FROM test_users
+        WHERE id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MIN(id) AS keep_id FROM test_users GROUP BY email
+            ) k
+        )
+        ORDER BY id
+        LIMIT %s
+    """
+    # 分批删除，避免单条 DELETE 删除过多行导致 undo log 过大；
+    # ORDER BY id 让每批删哪些行是确定的（statement 格式 binlog 复制也安全）
+    CHUNK = 50000
+    total = 0
+    while True:
+        rows = db.execute_non_query(sql, (CHUNK,))
+        total += rows
+        if rows < CHUNK:
+            break
+    if not total:
         print("✅ No duplicates.")
         return
-    ids = [row["id"] for row in to_delete]
-    # 分批删除，避免 IN 列表过大
-    CHUNK = 500
-    total = 0
-    for i in range(0, len(ids), CHUNK):
-        batch = ids[i:i+CHUNK]
-        placeholders = ",".join(["%s"] * len(batch))
-        sql = f"DELETE FROM test_users WHERE id IN ({placeholders})"
-        total += db.execute_non_query(sql, tuple(batch))
     print(f"Removed duplicates: {total}")
 
 def cmd_tx_demo(db: MySqlHelper):
     """事务示例：两条操作要么都成功，要么都回滚"""
     try:
-        with db._get_cursor() as c:  # 用你的 helper 的事务封装也可以，这里展示失败回滚
-            # 手动开始事务：关闭自动提交
-            db._get_connection().autocommit(False)
-        # 用你已有的上下文管理器会更优雅；此处用 execute_non_query 触发回滚/提交
-        try:
+        # 块内的语句共用一个事务：正常结束才提交，任一条失败则整体回滚
+        with db.transaction():
             # 假设先插入一条
             db.execute_non_query(
                 "INSERT INTO test_users (name, email) VALUES (%s, %s)",
@@ -127,15 +135,8 @@ def cmd_tx_demo(db: MySqlHelper):
                 "INSERT INTO test_users (name, email) VALUES (%s, %s)",
                 ("TxUserDup", "tx@example.com"),  # duplicate email
             )
-            # 成功则提交
-            db._get_connection().commit()
-        except Exception as e:
-            db._get_connection().rollback()
-            print(f"❌ Transaction rolled back: {e}")
-        finally:
-            db._get_connection().autocommit(True)
     except Exception as e:
-        print(f"❌ TX demo error: {e}")
+        print(f"❌ Transaction rolled back: {e}")
 
 def cmd_drop(db: MySqlHelper):
     """删除演示表（谨慎）"""
@@ -145,9 +146,12 @@ def cmd_drop(db: MySqlHelper):
 
 def cmd_reindex(db: MySqlHelper):
     """重排 ID，让 id 连续"""
-    db.execute_non_query("SET @count = 0;")
-    db.execute_non_query("UPDATE test_users SET id = (@count := @count + 1) ORDER BY id;")
-    db.execute_non_query("ALTER TABLE test_users AUTO_INCREMENT = 1;")
+    # 三条语句一次发出：会话变量 @count 保证在同一连接上，也只需一次往返
+    db.execute_non_query(
+        "SET @count = 0; "
+        "UPDATE test_users SET id = (@count := @count + 1) ORDER BY id; "
+        "ALTER TABLE test_users AUTO_INCREMENT = 1;"
+    )
     print("✅ Reindexed table, IDs are now continuous.")
 
 def build_parser():
@@ -205,7 +209,8 @@ def main():
         user=args.user,
         password=password,
         database=args.database,
-        charset="utf8mb4"  # 透传给你的 helper 的 **kwargs
+        charset="utf8mb4",  # 透传给你的 helper 的 **kwargs
+        client_flag=CLIENT.MULTI_STATEMENTS  # reindex 需要一次执行多条语句
     )
 
     try:
@@ -7,10 +7,20 @@ safely.
 """
 
 import pymysql # 导入pymysql库：MySQL数据库连接库
+import os
+import tempfile
+import threading
+from itertools import chain
 from typing import List, Dict, Any, Optional, Union, Tuple
 import logging
 from contextlib import contextmanager
 
+try:
+    # 可选依赖：DBUtils 连接池；未安装时退回单连接
+    from dbutils.pooled_db import PooledDB
+except ImportError:
+    PooledDB = None
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -73,6 +83,8 @@ class MySqlHelper:
         password: str,
         database: str,
         port: int = 3306,
+        max_connections: int = 8,
+        min_cached: int = 0,
         **kwargs
     ) -> None:
         """
@@ -84,6 +96,8 @@ class MySqlHelper:
             password: Database password
             database: Database name
             port: Database port (default: 3306)
+            max_connections: Pool size limit when DBUtils is installed (default: 8)
+            min_cached: Idle connections opened up front by the pool (default: 0)
             **kwargs: Additional connection parameters for PyMySQL
         """
         self.host = host
@@ -92,18 +106,61 @@ class MySqlHelper:
         self.password = password
         self.database = database
         self.connection_params = kwargs
+        self.max_connections = max_connections
+        self.min_cached = min_cached
         self.connection = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # 每个线程各自记录 transaction() 中固定使用的连接
+        self._local = threading.local()
     
     def _get_connection(self):
         """
         Get a database connection, creating a new one if necessary.
         
+        Inside transaction() the connection pinned to the current thread is
+        returned. Otherwise, when DBUtils is installed, a connection is taken
+        from the pool and must be handed back with _release().
+        
         Returns:
-            A PyMySQL connection object
+            A PyMySQL connection object (or a pooled proxy of one)
             
         Raises:
             pymysql.Error: If connection fails
         """
+        tx_conn = getattr(self._local, "conn", None)
+        if tx_conn is not None:
+            return tx_conn
+        
+        if PooledDB is not None:
+            if self._pool is None:
+                # 多个线程可能同时首次取连接：加锁并二次检查，保证只建一个连接池
+                with self._pool_lock:
+                    if self._pool is None:
+                        try:
+                            self._pool = PooledDB(
+                                creator=pymysql,
+                                maxconnections=self.max_connections,
+                                mincached=self.min_cached,
+                                blocking=True,
+                                # _get_cursor/transaction() 归还前已自行提交或回滚，
+                                # 取/还连接时不再额外发 ping 与 ROLLBACK，省掉两次往返
+                                ping=0,
+                                reset=False,
+                                host=self.host,
+                                port=self.port,
+                                user=self.user,
+                                password=self.password,
+                                database=self.database,
+                                cursorclass=pymysql.cursors.DictCursor,
+                                **self.connection_params
+                            )
+                            logger.info(f"Created MySQL connection pool for {self.host}")
+                        except pymysql.Error as e:
+                            logger.error(f"Failed to connect to MySQL: {e}")
+                            raise
+            return self._pool.connection()
+        
         if self.connection is None or not self.connection.open:
             try:
                 self.connection = pymysql.connect(
@@ -121,6 +178,14 @@ class MySqlHelper:
                 raise
         return self.connection
     
+    def _in_transaction(self) -> bool:
+        return getattr(self._local, "conn", None) is not None
+    
+    def _release(self, conn) -> None:
+        """把连接还给连接池（单连接模式或事务中不做处理）"""
+        if self._pool is not None and not self._in_transaction():
+            conn.close()
+    
     @contextmanager
     def _get_cursor(self):
         """
@@ -139,14 +204,45 @@ class MySqlHelper:
         try:
             cursor = conn.cursor()
             yield cursor
-            conn.commit()
+            # 在 transaction() 块内由外层统一提交/回滚
+            if not self._in_transaction():
+                conn.commit()
         except Exception as e:
-            conn.rollback()
+            if not self._in_transaction():
+                conn.rollback()
             logger.error(f"Database operation failed: {e}")
             raise
         finally:
             if cursor:
                 cursor.close()
+            self._release(conn)
+    
+    @contextmanager
+    def transaction(self):
+        """
+        显式事务：块内所有操作只在结束时提交一次，任一步出错则整体回滚。
+        嵌套使用时只有最外层生效；块内所有操作固定在同一条连接上（临时表、会话变量可用）。
+        
+        Example:
+            with db.transaction():
+                db.execute_non_query("INSERT ...", (...))
+                db.execute_non_query("UPDATE ...", (...))
+        """
+        if self._in_transaction():
+            yield self._get_connection()
+            return
+        conn = self._get_connection()
+        self._local.conn = conn
+        try:
+            conn.begin()
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self._release(conn)
     
     def create_database_if_not_exists(self, dbname: str, charset: str = "utf8mb4", collate: str = "utf8mb4_general_ci") -> None:
         """
@@ -172,7 +268,7 @@ class MySqlHelper:
             """,
             (schema, table_name),
         )
-        return cur.fetchone() is not None
+            return cur.fetchone() is not None
     
     def ensure_table(self, create_table_sql: str, table_name: Optional[str] = None, schema: Optional[str] = None) -> None:
         """
@@ -260,6 +356,9 @@ class MySqlHelper:
         try:
             with self._get_cursor() as cursor:
                 affected_rows = cursor.execute(sql, params or ())
+                # 多语句（需 CLIENT.MULTI_STATEMENTS）时读完剩余结果集，再提交
+                while cursor.nextset():
+                    pass
                 logger.debug(f"Query affected {affected_rows} rows")
                 return affected_rows
         except pymysql.Error as e:
@@ -303,8 +402,111 @@ class MySqlHelper:
             logger.error(f"Batch query failed: {e}\nSQL: {sql}")
             raise
     
+    def bulk_insert(
+        self,
+        sql_prefix: str,
+        rows: List[tuple],
+        sql_suffix: str = "",
+        chunk_size: int = 500
+    ) -> int:
+        """
+        Insert rows with multi-row VALUES statements, one statement per chunk.
+        
+        Args:
+            sql_prefix: Statement head up to and including VALUES,
+                e.g. "INSERT IGNORE INTO users (name, email) VALUES"
+            rows: List of parameter tuples, all of the same length
+            sql_suffix: Optional tail such as "ON DUPLICATE KEY UPDATE ..."
+            chunk_size: Maximum number of rows per statement
+            
+        Returns:
+            Number of rows affected (total for all chunks)
+            
+        Example:
+            rowcount = db.bulk_insert(
+                "INSERT IGNORE INTO users (name, email) VALUES",
+                [('Alice', 'alice@example.com'), ('Bob', 'bob@example.com')]
+            )
+        """
+        if not rows:
+            return 0
+        
+        placeholder = "(" + ",".join(["%s"] * len(rows[0])) + ")"
+        total = 0
+        try:
+            # 所有分块共用一个游标，只在最后提交一次
+            with self._get_cursor() as cursor:
+                for i in range(0, len(rows), chunk_size):
+                    batch = rows[i:i + chunk_size]
+                    sql = f"{sql_prefix} {','.join([placeholder] * len(batch))} {sql_suffix}"
+                    total += cursor.execute(sql, tuple(chain.from_iterable(batch)))
+            logger.debug(f"Bulk insert affected {total} rows")
+            return total
+        except pymysql.Error as e:
+            logger.error(f"Bulk insert failed: {e}\nSQL: {sql_prefix} ... {sql_suffix}")
+            raise
+    
+    @staticmethod
+    def _tsv_field(value: Any) -> str:
+        """按 LOAD DATA 默认格式转义单个字段：NULL 写作 \\N，反斜杠/制表符/换行加转义"""
+        if value is None:
+            return "\\N"
+        return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+                .replace("\n", "\\n").replace("\r", "\\r"))
+    
+    def load_data_local(
+        self,
+        table: str,
+        columns: List[str],
+        rows: List[tuple],
+        duplicate: str = ""
+    ) -> int:
+        """
+        Bulk load rows with LOAD DATA LOCAL INFILE via a temporary TSV file.
+        
+        The connection must be opened with local_infile=True, and the server
+        must allow local_infile.
+        
+        Args:
+            table: Target table name
+            columns: Column names matching the order of values in each row
+            rows: List of parameter tuples
+            duplicate: "", "IGNORE" or "REPLACE" for duplicate-key handling
+            
+        Returns:
+            Number of rows affected
+            
+        Example:
+            rowcount = db.load_data_local(
+                "users", ["name", "email"],
+                [('Alice', 'alice@example.com'), ('Bob', 'bob@example.com')]
+            )
+        """
+        if not rows:
+            return 0
+        
+        fd, path = tempfile.mkstemp(suffix=".tsv")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                for row in rows:
+                    f.write("\t".join(self._tsv_field(v) for v in row))
+                    f.write("\n")
+            sql = (
+                f"LOAD DATA LOCAL INFILE %s {duplicate} INTO TABLE {table} "
+                f"CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                f"({', '.join(columns)})"
+            )
+            return self.execute_non_query(sql, (path,))
+        finally:
+            os.remove(path)
+    
     def close(self) -> None:
-        """Close the database connection if it's open."""
+        """Close the connection pool and the database connection if they're open."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+            logger.info("Database connection pool closed")
         if self.connection and self.connection.open:
             self.connection.close()
             self.connection = None
@@ -391,4 +593,4 @@ if __name__ == "__main__":
             print(f"An error occurred: {e}")
             raise
 
-        # 改进方向：语义化包装；连接池
+        # 改进方向：语义化包装
@@ -9,13 +9,30 @@
 
 import argparse
 import datetime
+import hashlib
 import json
 import re
-from typing import List, Dict, Any, Optional
+import sys
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    # 可选依赖：selectolax 是 C 实现的 HTML 解析器，CSS 查询比 BeautifulSoup 快得多
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+    from bs4 import BeautifulSoup
+
+try:
+    # 可选依赖：orjson 用 C 解析，大段页面 JSON 更快；未安装则退回标准库
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 from mysql_helper import MySqlHelper
 
@@ -23,9 +40,18 @@ BAIDU_REALTIME_URL = "https://top.baidu.com/board?platform=pc&tab=realtime"
 HEADERS = {
     "User-Agent": ("Mozilla/5.0 (Macintosh; Intel Mac OS X 13_0) "
                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                   "Chrome/124.0.0.0 Safari/537.36")
+                   "Chrome/124.0.0.0 Safari/537.36"),
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive"
 }
 
+# 复用连接（连接池 + keep-alive），5xx/429 自动退避重试
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+))
+
 CREATE_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS baidu_hotsearch (
   id           BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
@@ -43,36 +69,46 @@ CREATE TABLE IF NOT EXISTS baidu_hotsearch (
 # ---------- 抓取与解析 ----------
 
 def fetch_html(timeout: int = 15) -> str:
-    resp = requests.get(BAIDU_REALTIME_URL, headers=HEADERS, timeout=timeout)
+    resp = SESSION.get(BAIDU_REALTIME_URL, headers=HEADERS, timeout=timeout)
     resp.raise_for_status()
     return resp.text
 
+INITIAL_STATE_MARKER = "window.__INITIAL_STATE__"
+_RE_INITIAL_STATE = re.compile(r"window\.__INITIAL_STATE__\s*=\s*(\{.*?\})\s*;\s*</script>", re.S)
+
+def _find_items(data: Any) -> Optional[List[Any]]:
+    # 常见结构：data.cards[0].content 就是榜单列表，命中则不必遍历整棵树
+    try:
+        content = data["data"]["cards"][0]["content"]
+        if isinstance(content, list) and content and isinstance(content[0], dict):
+            return content
+    except (KeyError, IndexError, TypeError):
+        pass
+
+    # 兜底：显式栈深度优先，找到第一个名为 items 的列表即返回
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            v = obj.get("items")
+            if isinstance(v, list):
+                return v
+            # 逆序压栈，保持与递归版本相同的遍历顺序
+            stack.extend(reversed(list(obj.values())))
+        elif isinstance(obj, list):
+            stack.extend(reversed(obj))
+    return None
+
 def parse_from_initial_state(html: str) -> Optional[List[Dict[str, Any]]]:
-    m = re.search(r"window\.__INITIAL_STATE__\s*=\s*(\{.*?\})\s*;\s*</script>", html, re.S)
+    m = _RE_INITIAL_STATE.search(html)
     if not m:
         return None
     try:
-        data = json.loads(m.group(1))
+        data = json_loads(m.group(1))
     except Exception:
         return None
 
-    # 递归挖出 items
-    def dig(obj):
-        if isinstance(obj, dict):
-            if "items" in obj and isinstance(obj["items"], list):
-                return obj["items"]
-            for v in obj.values():
-                r = dig(v)
-                if r is not None:
-                    return r
-        elif isinstance(obj, list):
-            for v in obj:
-                r = dig(v)
-                if r is not None:
-                    return r
-        return None
-
-    raw = dig(data)
+    raw = _find_items(data)
     if not raw:
         return None
 
@@ -85,25 +121,43 @@ def parse_from_initial_state(html: str) -> Optional[List[Dict[str, Any]]]:
         items.append({"rank": i, "title": title, "url": url})
     return items
 
+CARD_SELECTOR = ".category-wrap_iQLoo .content_1YWBm"
+
+def _iter_cards_selectolax(html: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """逐张卡片返回 (title, href)"""
+    for card in HTMLParser(html).css(CARD_SELECTOR):
+        title_el = card.css_first(".c-single-text-ellipsis") or card.css_first("a")
+        link_el = card.css_first("a[href]")
+        yield (title_el.text(strip=True) if title_el else "",
+               link_el.attributes.get("href") if link_el else None)
+
+def _iter_cards_bs4(html: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """未安装 selectolax 时的回退实现"""
+    for card in BeautifulSoup(html, "lxml").select(CARD_SELECTOR):
+        title_el = card.select_one(".c-single-text-ellipsis") or card.find("a")
+        link_el = card.find("a", href=True)
+        yield (title_el.get_text(strip=True) if title_el else "",
+               link_el["href"] if link_el else None)
+
 def parse_from_html(html: str) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html, "lxml")
-    cards = soup.select(".category-wrap_iQLoo .content_1YWBm")
+    cards = _iter_cards_selectolax(html) if HTMLParser else _iter_cards_bs4(html)
     out = []
     rank = 1
-    for card in cards:
-        title_el = card.select_one(".c-single-text-ellipsis") or card.find("a")
-        title = (title_el.get_text(strip=True) if title_el else "").strip()
+    for title, href in cards:
+        title = title.strip()
         if not title:
             continue
-        link_el = card.find("a", href=True)
-        url = urljoin(BAIDU_REALTIME_URL, link_el["href"]) if link_el else None
+        url = urljoin(BAIDU_REALTIME_URL, href) if href else None
         out.append({"rank": rank, "title": title, "url": url})
         rank += 1
     return out
 
 def get_top_n(n: int = 10) -> List[Dict[str, Any]]:
     html = fetch_html()
-    items = parse_from_initial_state(html) or []
+    # 页面里没有注入的 JSON 时直接走 HTML 解析，省掉正则扫描与 JSON 解码
+    items = []
+    if INITIAL_STATE_MARKER in html:
+        items = parse_from_initial_state(html) or []
     if len(items) < n:
         items = parse_from_html(html) or []
     return items[:n]
@@ -113,21 +167,80 @@ def get_top_n(n: int = 10) -> List[Dict[str, Any]]:
 def ensure_table(db: MySqlHelper):
     db.execute_non_query(CREATE_TABLE_SQL)
 
+# 超过该行数时改用 LOAD DATA LOCAL INFILE 导入
+LOAD_DATA_THRESHOLD = 200
+
+CREATE_STAGING_SQL = """
+CREATE TEMPORARY TABLE tmp_baidu_hotsearch (
+  rank_no    INT UNSIGNED NOT NULL,
+  title      VARCHAR(255) NOT NULL,
+  url        VARCHAR(500) NULL,
+  grabbed_at DATETIME     NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+""".strip()
+
+def _save_items_via_load_data(db: MySqlHelper, params: List[tuple]) -> int:
+    # LOAD DATA 本身没有 ON DUPLICATE KEY UPDATE：先导入无约束的临时表，
+    # 再 INSERT ... SELECT 合并进正式表，保持与多行 upsert 相同的语义
+    with db.transaction():
+        db.execute_non_query(CREATE_STAGING_SQL)
+        try:
+            db.load_data_local("tmp_baidu_hotsearch", ["rank_no", "title", "url", "grabbed_at"], params)
+            return db.execute_non_query("""
+            INSERT INTO baidu_hotsearch (rank_no, title, url, grabbed_at)
+            SELECT rank_no, title, url, grabbed_at FROM tmp_baidu_hotsearch
+            ON DUPLICATE KEY UPDATE
+              url        = VALUES(url),
+              grabbed_at = VALUES(grabbed_at)
+            """)
+        finally:
+            db.execute_non_query("DROP TEMPORARY TABLE IF EXISTS tmp_baidu_hotsearch")
+
+# 记录当天最近一次入库的榜单签名；榜单没变时跳过写库
+SIG_CACHE_DIR = Path.home() / ".cache" / "baidu_hot"
+
+def _items_signature(db: MySqlHelper, params: List[tuple]) -> str:
+    # 目标库也算进签名，换库写入时不会误判为“已写过”
+    payload = json.dumps([db.host, db.port, db.database, [p[:3] for p in params]],
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
 def save_items(db: MySqlHelper, items: List[Dict[str, Any]]) -> int:
     now = datetime.datetime.now()
-    sql = """
-    INSERT INTO baidu_hotsearch
-      (rank_no, title, url, grabbed_at)
-    VALUES (%s, %s, %s, %s)
-    ON DUPLICATE KEY UPDATE
-      url        = VALUES(url),
-      grabbed_at = VALUES(grabbed_at);
-    """
     params = [(it["rank"], it["title"], it.get("url"), now)
               for it in items if it.get("title")]
     if not params:
         return 0
-    return db.execute_many(sql, params)
+
+    sig = _items_signature(db, params)
+    sig_file = SIG_CACHE_DIR / f"last_sig_{now.date().isoformat()}.txt"
+    try:
+        if sig_file.read_text(encoding="utf-8") == sig:
+            return 0
+    except OSError:
+        pass
+
+    if len(params) > LOAD_DATA_THRESHOLD:
+        n = _save_items_via_load_data(db, params)
+    else:
+        # 拼成多行 VALUES，一次往返写完整批
+        n = db.bulk_insert(
+            "INSERT INTO baidu_hotsearch (rank_no, title, url, grabbed_at) VALUES",
+            params,
+            """
+            ON DUPLICATE KEY UPDATE
+              url        = VALUES(url),
+              grabbed_at = VALUES(grabbed_at)
+            """,
+        )
+
+    # 签名缓存只是优化，写不进去不影响入库结果
+    try:
+        SIG_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        sig_file.write_text(sig, encoding="utf-8")
+    except OSError:
+        pass
+    return n
 
 # ---------- CLI ----------
 
@@ -151,8 +264,9 @@ def main():
         print("❌ 未抓到数据（页面结构可能变动或网络失败）")
         return
     print(f"抓到 {len(items)} 条：")
-    for it in items:
-        print(f"{it['rank']:>2} | {it['title'][:50]} | url={it.get('url')}")
+    sys.stdout.write("\n".join(
+        f"{it['rank']:>2} | {it['title'][:50]} | url={it.get('url')}" for it in items
+    ) + "\n")
 
     if args.print_only:
         return
@@ -161,7 +275,7 @@ def main():
     db = MySqlHelper(
         host=args.host, port=args.port, user=args.user,
         password=args.password, database=args.database,
-        charset="utf8mb4"
+        charset="utf8mb4", local_infile=True  # 大批量时 save_items 走 LOAD DATA LOCAL
     )
     try:
         ensure_table(db)
@@ -10,22 +10,47 @@ Douban Top100 → MySQL (单文件版)
 
 import argparse
 import datetime
+import random
 import re
+import threading
 import time
-from typing import List, Dict, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Dict, Tuple, Optional
 
 import requests
-from bs4 import BeautifulSoup
+from pymysql.constants import CLIENT
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from mysql_helper import MySqlHelper
 
+try:
+    # 可选依赖：selectolax 是 C 实现的 HTML 解析器，CSS 查询比 BeautifulSoup 快得多
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+    from bs4 import BeautifulSoup, SoupStrainer
+
 BASE_URL = "https://movie.douban.com/top250"
 HEADERS = {
     "User-Agent": ("Mozilla/5.0 (Macintosh; Intel Mac OS X 13_3) "
                    "AppleWebKit/537.36 (KHTML, like Gecko) "
                    "Chrome/124.0.0.0 Safari/537.36"),
-    "Referer": "https://movie.douban.com/"
+    "Referer": "https://movie.douban.com/",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive"
 }
 
+# 所有列表页共用一个 Session（连接池 + keep-alive，只握手一次）；5xx/429 先由适配器短退避重试，
+# 重试用尽后返回最后一次响应，交给 crawl_top_n 做更长的退避
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.5,
+                      status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+))
+# 信号量限制同时在途的请求数
+_FETCH_SLOTS = threading.Semaphore(2)
+
 # -------------------- 建表 SQL（统一 douban_* 前缀） --------------------
 
 CREATE_MOVIES = """
@@ -97,81 +122,139 @@ def ensure_schema(db: MySqlHelper):
 # -------------------- 抓取与解析 --------------------
 
 def fetch_list_page(start: int, timeout: int = 15) -> str:
-    resp = requests.get(BASE_URL, params={"start": start, "filter": ""}, headers=HEADERS, timeout=timeout)
+    with _FETCH_SLOTS:
+        resp = SESSION.get(BASE_URL, params={"start": start, "filter": ""}, headers=HEADERS, timeout=timeout)
     resp.raise_for_status()
     return resp.text
 
+# 解析用正则/词表：模块级预编译，避免每张卡片重复查缓存
+_RE_SUBJECT = re.compile(r"/subject/(\d+)/")
+_RE_VOTES_TAG = re.compile(r"评价")
+_RE_VOTES = re.compile(r"(\d[\d,]*)")
+_RE_DIRECTOR = re.compile(r"导演[:：]\s*([^/]+)")
+_RE_YEAR = re.compile(r"(\d{4})")
+_RE_YEAR_FULL = re.compile(r"\d{4}")
+_RE_WS = re.compile(r"\s+")
+_RE_EN_GENRE = re.compile(
+    r"^(Animation|Comedy|Action|Romance|Sci[- ]?Fi|Mystery|Thriller|Horror|Documentary|Short|Biography"
+    r"|History|War|Western|Fantasy|Adventure|Crime|Family|Music|Musical)$",
+    re.I,
+)
+TYPE_WORDS = frozenset({
+    "剧情","喜剧","动作","爱情","科幻","动画","悬疑","惊悚","恐怖","纪录片","短片",
+    "情色","同性","音乐","歌舞","传记","历史","战争","西部","奇幻","冒险","灾难",
+    "武侠","古装","犯罪","家庭","儿童","运动","真人秀","脱口秀"
+})
+
+def _iter_cards_selectolax(html: str) -> Iterator[Dict[str, Any]]:
+    """用 selectolax 抽出每张卡片的原始文本字段"""
+    for node in HTMLParser(html).css("div.item"):
+        a = node.css_first("div.hd a")
+        if not a:
+            continue
+        em = node.css_first("em")
+        other = node.css_first("span.other")
+        rn = node.css_first("span.rating_num")
+        votes_el = next((sp for sp in node.css("span") if _RE_VOTES_TAG.search(sp.text(deep=False))), None)
+        info_el = node.css_first("div.bd p")
+        info = info_el.text(separator="\n", strip=True) if info_el else ""
+        yield {
+            "rank": em.text(strip=True) if em else "",
+            "url": a.attributes.get("href"),
+            "link_text": a.text(strip=True),
+            "titles": [sp.text(strip=True) for sp in node.css("span.title")],
+            "other": other.text(strip=True) if other else None,
+            "rating": rn.text(strip=True) if rn else None,
+            "votes": votes_el.text() if votes_el else None,
+            # 与 BeautifulSoup 的 get_text("\n", strip=True) 对齐：去掉空白文本节点
+            "info": "\n".join(x for x in info.split("\n") if x),
+        }
+
+def _iter_cards_bs4(html: str) -> Iterator[Dict[str, Any]]:
+    """未安装 selectolax 时的回退实现：只构建电影卡片节点"""
+    soup = BeautifulSoup(html, "lxml", parse_only=SoupStrainer("div", class_="item"))
+    for div in soup.select("div.item"):
+        a = div.select_one("div.hd a")
+        if not a:
+            continue
+        em = div.select_one("em")
+        other = div.select_one("span.other")
+        rn = div.select_one("span.rating_num")
+        pv = div.find("span", string=_RE_VOTES_TAG)
+        info_el = div.select_one("div.bd p")
+        yield {
+            "rank": em.get_text(strip=True) if em else "",
+            "url": a["href"],
+            "link_text": a.get_text(strip=True),
+            "titles": [sp.get_text(strip=True) for sp in div.select("span.title")],
+            "other": other.get_text(strip=True) if other else None,
+            "rating": rn.get_text(strip=True) if rn else None,
+            "votes": pv.get_text() if pv else None,
+            "info": info_el.get_text("\n", strip=True) if info_el else "",
+        }
+
 def parse_list(html: str) -> List[Dict]:
     """
     解析列表页的一项项电影卡片。
     返回字段：rank_no, douban_id, title, original_title, year, rating, votes, director, countries(list), genres(list), url
     """
-    soup = BeautifulSoup(html, "lxml")
+    cards = _iter_cards_selectolax(html) if HTMLParser else _iter_cards_bs4(html)
     items: List[Dict] = []
 
-    for div in soup.select("div.item"):
+    for card in cards:
         # rank
-        em = div.select_one("em")
-        rank_no = int(em.get_text(strip=True)) if em and em.get_text(strip=True).isdigit() else None
+        rank_no = int(card["rank"]) if card["rank"].isdigit() else None
 
         # 标题与链接
-        a = div.select_one("div.hd a")
-        if not a:
-            continue
-        url = a["href"]
-        m = re.search(r"/subject/(\d+)/", url)
+        url = card["url"]
+        m = _RE_SUBJECT.search(url or "")
         douban_id = m.group(1) if m else None
 
-        title_spans = div.select("span.title")
-        title = title_spans[0].get_text(strip=True) if title_spans else a.get_text(strip=True)
+        title_spans = card["titles"]
+        title = title_spans[0] if title_spans else card["link_text"]
 
         # 原名（可选）
         original_title = None
         if len(title_spans) > 1:
-            t2 = title_spans[1].get_text(strip=True)
+            t2 = title_spans[1]
             original_title = t2.strip(" /") if t2 else None
-        else:
-            other = div.select_one("span.other")
-            if other:
-                original_title = other.get_text(strip=True).strip(" /")
+        elif card["other"]:
+            original_title = card["other"].strip(" /")
 
         # 评分与投票
         rating = None
-        rn = div.select_one("span.rating_num")
-        if rn:
+        if card["rating"]:
             try:
-                rating = float(rn.get_text(strip=True))
+                rating = float(card["rating"])
             except:
                 rating = None
 
         votes = None
-        pv = div.find("span", string=re.compile(r"评价"))
-        if pv:
-            mv = re.search(r"(\d[\d,]*)", pv.get_text())
+        if card["votes"]:
+            mv = _RE_VOTES.search(card["votes"])
             if mv:
                 votes = int(mv.group(1).replace(",", ""))
 
         # 信息块（导演/主演；年份/国家/类型）
-        info = div.select_one("div.bd p").get_text("\n", strip=True) if div.select_one("div.bd p") else ""
-        parts = info.split("\n")
+        parts = card["info"].split("\n")
         director = None
         if parts:
-            md = re.search(r"导演[:：]\s*([^/]+)", parts[0])
+            md = _RE_DIRECTOR.search(parts[0])
             director = (md.group(1).strip() if md else parts[0].split("主演")[0]).strip()
-            director = re.sub(r"\s+", " ", director)
+            director = _RE_WS.sub(" ", director)
 
         # 第二行一般 "1994 / 美国 / 犯罪 剧情"
         countries, genres, year = [], [], None
         if len(parts) > 1:
             segs = [s.strip() for s in parts[1].split("/") if s.strip()]
             # 年份
-            y = re.search(r"(\d{4})", " ".join(segs))
+            y = _RE_YEAR.search(" ".join(segs))
             if y:
                 year = int(y.group(1))
             # 含空格的继续拆
             cands: List[str] = []
             for s in segs:
-                if re.fullmatch(r"\d{4}", s):
+                if _RE_YEAR_FULL.fullmatch(s):
                     continue
                 if " " in s:
                     cands.extend([x for x in s.split() if x])
@@ -179,13 +262,8 @@ def parse_list(html: str) -> List[Dict]:
                     cands.append(s)
 
             # 粗略分拣：类型词 → genres；其余 → countries
-            type_words = {
-                "剧情","喜剧","动作","爱情","科幻","动画","悬疑","惊悚","恐怖","纪录片","短片",
-                "情色","同性","音乐","歌舞","传记","历史","战争","西部","奇幻","冒险","灾难",
-                "武侠","古装","犯罪","家庭","儿童","运动","真人秀","脱口秀"
-            }
             for w in cands:
-                if w in type_words or re.search(r"^(Animation|Comedy|Action|Romance|Sci[- ]?Fi|Mystery|Thriller|Horror|Documentary|Short|Biography|History|War|Western|Fantasy|Adventure|Crime|Family|Music|Musical)$", w, re.I):
+                if w in TYPE_WORDS or _RE_EN_GENRE.match(w):
                     genres.append(w)
                 else:
                     countries.append(w)
@@ -209,32 +287,50 @@ def parse_list(html: str) -> List[Dict]:
 def crawl_top_n(n: int = 100, sleep_sec: Tuple[float, float] = (1.2, 2.5)) -> List[Dict]:
     """抓取前 n 条（Top100=4页，每页25条）"""
     pages = (n + 24) // 25
+    starts = [i * 25 for i in range(pages)]
+
+    def fetch(start: int) -> str:
+        try:
+            return fetch_list_page(start)
+        except requests.HTTPError as e:
+            # 被限流（429）时退避一段时间再试一次
+            if e.response is None or e.response.status_code != 429:
+                raise
+            time.sleep(random.uniform(*sleep_sec))
+            return fetch_list_page(start)
+
+    # 并发抓取各页（网络是瓶颈），提交之间加一点随机间隔
+    with ThreadPoolExecutor(max_workers=max(1, min(pages, 4))) as pool:
+        futures = {}
+        for start in starts:
+            if futures:
+                time.sleep(random.uniform(0.1, 0.5))
+            futures[start] = pool.submit(fetch, start)
+        html_by_start = {start: f.result() for start, f in futures.items()}
+
+    # 按排名顺序串行解析
     all_items: List[Dict] = []
-    for i in range(pages):
-        start = i * 25
-        html = fetch_list_page(start)
-        page_items = parse_list(html)
-        all_items.extend(page_items)
-        time.sleep((sleep_sec[0] + sleep_sec[1]) / 2.0)
-
-    # 去重（按 douban_id）
-    seen, uniq = set(), []
+    for start in starts:
+        all_items.extend(parse_list(html_by_start[start]))
+
+    # 去重（按 douban_id）：dict 保持插入顺序，setdefault 保留第一次出现的条目
+    by_key: Dict = {}
     for it in all_items:
-        key = it.get("douban_id") or (it["title"], it.get("year"))
-        if key in seen:
-            continue
-        seen.add(key)
-        uniq.append(it)
+        by_key.setdefault(it.get("douban_id") or (it["title"], it.get("year")), it)
 
-    uniq.sort(key=lambda x: x["rank_no"] or 9999)
+    # 排序键每条只算一次；缺排名的排到最后
+    uniq = sorted(by_key.values(), key=lambda x: x["rank_no"] or 9999)
     return uniq[:n]
 
 # -------------------- 入库（Upsert + 维表映射） --------------------
 
-UPSERT_MOVIE_SQL = """
+UPSERT_MOVIES_SQL_PREFIX = """
 INSERT INTO douban_movies
   (douban_id, rank_no, title, original_title, year, rating, votes, director, url, grabbed_at)
-VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+VALUES
+""".strip()
+
+UPSERT_MOVIES_SQL_SUFFIX = """
 ON DUPLICATE KEY UPDATE
   rank_no=VALUES(rank_no),
   title=VALUES(title),
@@ -244,14 +340,17 @@ ON DUPLICATE KEY UPDATE
   votes=VALUES(votes),
   director=VALUES(director),
   url=VALUES(url),
-  grabbed_at=VALUES(grabbed_at);
+  grabbed_at=VALUES(grabbed_at)
 """.strip()
 
-def upsert_movie(db: MySqlHelper, m: Dict) -> int:
-    """插/改 douban_movies，返回 movie_id"""
-    now = datetime.datetime.now()
-    db.execute_non_query(UPSERT_MOVIE_SQL, (
-        m.get("douban_id"),
+def _in_placeholders(values) -> str:
+    return ",".join(["%s"] * len(values))
+
+def upsert_movies(db: MySqlHelper, movies: List[Dict], grabbed_at: datetime.datetime) -> Dict[str, int]:
+    """批量插/改 douban_movies（同一次抓取共用 grabbed_at），返回 douban_id → movie_id"""
+    # douban_id 是唯一键且 NOT NULL，缺失的直接跳过，避免整批失败
+    rows = [(
+        m["douban_id"],
         m.get("rank_no"),
         m.get("title"),
         m.get("original_title"),
@@ -260,55 +359,88 @@ def upsert_movie(db: MySqlHelper, m: Dict) -> int:
         m.get("votes"),
         m.get("director"),
         m.get("url"),
-        now
-    ))
-    row = db.execute_query("SELECT id FROM douban_movies WHERE douban_id=%s", (m.get("douban_id"),))
-    return row[0]["id"]
+        grabbed_at
+    ) for m in movies if m.get("douban_id")]
+    if not rows:
+        return {}
+    db.bulk_insert(UPSERT_MOVIES_SQL_PREFIX, rows, UPSERT_MOVIES_SQL_SUFFIX)
+
+    # 一次查回所有主键
+    ids = [r[0] for r in rows]
+    found = db.execute_query(
+        f"SELECT id, douban_id FROM douban_movies WHERE douban_id IN ({_in_placeholders(ids)})",
+        tuple(ids),
+    )
+    return {r["douban_id"]: r["id"] for r in found}
+
+DIM_TABLES = ("douban_genre", "douban_country")
+
+def load_dim_cache(db: MySqlHelper) -> Dict[Tuple[str, str], int]:
+    """预热维表缓存：(dim_table, 小写 name) → id；维表按 utf8mb4_general_ci 比较，键统一转小写"""
+    # 所有维表用 UNION ALL 拼成一条查询，一次往返取回
+    sql = " UNION ALL ".join(f"SELECT '{t}' AS dim_table, id, name FROM {t}" for t in DIM_TABLES)
+    return {(r["dim_table"], r["name"].lower()): r["id"] for r in db.execute_query(sql)}
 
 def ensure_dim_and_map(
     db: MySqlHelper,
-    movie_id: int,
-    names: List[str],
+    movie_names: Dict[int, List[str]],  # movie_id → names
     dim_table: str,
     map_table: str,
     map_fk_col: str,  # "genre_id" 或 "country_id"
+    dim_cache: Optional[Dict[Tuple[str, str], int]] = None,
 ) -> None:
-    """把 names 写入维表，并与 movie 建映射（主键(movie_id, *_id) 保证幂等）"""
-    # 去重 + 清洗
-    clean_names = []
-    seen = set()
-    for n in names or []:
-        n = (n or "").strip()
-        if not n:
-            continue
-        if n in seen:
-            continue
-        seen.add(n)
-        clean_names.append(n)
-
-    if not clean_names:
+    """
+    把所有电影的 names 批量写入维表，并与 movie 建映射（主键(movie_id, *_id) 保证幂等）。
+    dim_cache 为 (dim_table, 小写 name) → id，整次抓取共用；已缓存的名字不再访问维表。
+    """
+    if dim_cache is None:
+        dim_cache = {}
+
+    # 去重 + 清洗，得到 (movie_id, name) 对
+    pairs: List[Tuple[int, str]] = []
+    for movie_id, names in movie_names.items():
+        seen = set()
+        for n in names or []:
+            n = (n or "").strip()
+            if not n:
+                continue
+            if n in seen:
+                continue
+            seen.add(n)
+            pairs.append((movie_id, n))
+
+    if not pairs:
         return
 
-    with db._get_cursor() as cur:
-        for name in clean_names:
-            # 1) 维表 upsert，并把现有 id 写入 LAST_INSERT_ID()，这样无论插入还是命中唯一键，
-            #    cur.lastrowid 都会得到该行的主键 id
+    missing = [n for n in dict.fromkeys(n for _, n in pairs)
+               if (dim_table, n.lower()) not in dim_cache]
+    if missing:
+        # 1) 只对缓存里没有的名字做维表批量 upsert（已存在的名字命中唯一键，保留原 id）
+        # 2) 再查回 name → id 写进缓存；两条语句用分号拼接，一次往返发出
+        #    （需要连接开启 CLIENT.MULTI_STATEMENTS）
+        values = ",".join(["(%s)"] * len(missing))
+        with db._get_cursor() as cur:
             cur.execute(
-                f"""
-                INSERT INTO {dim_table}(name) VALUES (%s)
-                ON DUPLICATE KEY UPDATE
-                  id = LAST_INSERT_ID(id),   -- 关键点：复用已有 id
-                  name = VALUES(name)
-                """,
-                (name,),
-            )
-            dim_id = cur.lastrowid  # 这里即可拿到 id
-
-            # 2) 映射表去重插入
-            cur.execute(
-                f"INSERT IGNORE INTO {map_table}(movie_id, {map_fk_col}) VALUES (%s, %s)",
-                (movie_id, dim_id),
+                f"INSERT INTO {dim_table}(name) VALUES {values} "
+                f"ON DUPLICATE KEY UPDATE name = VALUES(name); "
+                f"SELECT id, name FROM {dim_table} WHERE name IN ({_in_placeholders(missing)})",
+                tuple(missing) * 2,
             )
+            cur.nextset()  # 跳过 INSERT 的结果，切到 SELECT
+            rows = cur.fetchall()
+        for r in rows:
+            dim_cache[(dim_table, r["name"].lower())] = r["id"]
+
+    # 3) 映射表批量去重插入
+    map_rows = []
+    for movie_id, n in pairs:
+        dim_id = dim_cache.get((dim_table, n.lower()))
+        if dim_id is not None:
+            map_rows.append((movie_id, dim_id))
+    db.bulk_insert(
+        f"INSERT IGNORE INTO {map_table}(movie_id, {map_fk_col}) VALUES",
+        map_rows,
+    )
 
 # -------------------- CLI --------------------
 
@@ -328,6 +460,7 @@ def main():
 
     # 1) 抓取
     movies = crawl_top_n(args.top)
+    grabbed_at = datetime.datetime.now()
     print(f"抓到 {len(movies)} 条；预览前 5 条：")
     for m in movies[:5]:
         print(f"- #{m['rank_no']:>3} {m['title']} ({m.get('year')})  rating={m.get('rating')}  votes={m.get('votes')}  dir={m.get('director')}")
@@ -339,15 +472,20 @@ def main():
     db = MySqlHelper(
         host=args.host, port=args.port, user=args.user,
         password=args.password, database=args.database,
-        charset="utf8mb4"
+        charset="utf8mb4", client_flag=CLIENT.MULTI_STATEMENTS  # 维表 upsert + 查询合并成一次往返
     )
     try:
         ensure_schema(db)
-        for m in movies:
-            mid = upsert_movie(db, m)
-            # 维表映射（已统一成 douban_* 表名）
-            ensure_dim_and_map(db, mid, m.get("genres", []),    "douban_genre",   "douban_movie_genre",   "genre_id")
-            ensure_dim_and_map(db, mid, m.get("countries", []), "douban_country", "douban_movie_country", "country_id")
+        # 整次入库放在一个事务里：只提交一次，失败则整体回滚
+        with db.transaction():
+            id_map = upsert_movies(db, movies, grabbed_at)
+            saved = [m for m in movies if m.get("douban_id") in id_map]
+            # 维表映射（已统一成 douban_* 表名）；name → id 先整体预热，重复的名字不再访问维表
+            dim_cache = load_dim_cache(db)
+            ensure_dim_and_map(db, {id_map[m["douban_id"]]: m.get("genres", []) for m in saved},
+                               "douban_genre", "douban_movie_genre", "genre_id", dim_cache)
+            ensure_dim_and_map(db, {id_map[m["douban_id"]]: m.get("countries", []) for m in saved},
+                               "douban_country", "douban_movie_country", "country_id", dim_cache)
         print("✅ Top100 入库完成（幂等）。")
     finally:
         db.close()